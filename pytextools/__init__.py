@@ -1,4 +1,5 @@
 import os
+import functools
 import posixpath
 import pandas as pd
 import numpy as np
@@ -7,22 +8,37 @@ try:
 except ImportError:
     import pdb
 
-# use double curly braces {{}} for any 'LaTeX' curly braces
-# and single curly braces {} for any python formatting 
-swfig = r"""
-\begin{{sidewaysfigure}}{0}
-    \centering
-    \includegraphics[{1}]{{{2}}}{3}{4}
-\end{{sidewaysfigure}}"""
+# Figure environments, built by plain concatenation of the parts
+def _swfig(loc, args, path, cap, lab):
+    return ('\n\\begin{sidewaysfigure}' + loc + 
+            '\n    \\centering\n    \\includegraphics[' + args + ']{' + path + '}' + cap + lab + 
+            '\n\\end{sidewaysfigure}')
 
-#\caption{{{1}}}
-#\label{{fig:{2}}}
 
-normalfig = r"""
-\begin{{figure}}{0}
-    \centering
-    \includegraphics[{1}]{{{2}}}{3}{4}
-\end{{figure}}"""
+def _normalfig(loc, args, path, cap, lab):
+    return ('\n\\begin{figure}' + loc + 
+            '\n    \\centering\n    \\includegraphics[' + args + ']{' + path + '}' + cap + lab + 
+            '\n\\end{figure}')
+
+
+# Format strings used by fixed() and scientific(), cached by number of decimals
+_FIXED_CACHE = {}
+_SCI_CACHE = {}
+_SCI_TEX_CACHE = {}
+
+# Translation table for escaping LaTeX special characters
+_LATEX_ESC = str.maketrans({'&': r'\&', '%': r'\%', '$': r'\$', '#': r'\#',
+                            '_': r'\_', '{': r'\{', '}': r'\}', 
+                            '~': r'\textasciitilde{}', '^': r'\textasciicircum{}', 
+                            '\\': r'\textbackslash{}'})
+
+# df.to_latex arguments that have no counterpart in Styler.to_latex
+_DATAFRAME_ONLY_KWARGS = ('columns', 'header', 'index', 'index_names', 'escape', 
+                          'formatters', 'float_format', 'decimal', 'sparsify', 
+                          'bold_rows', 'multicolumn', 'multicolumn_format', 'multirow')
+
+# Buffer size used when with_file opens a file
+_BUFFER_SIZE = 1 << 20
 
 
 def _process_file(f, func, **kwargs):
@@ -33,23 +49,127 @@ def with_file(f, func, **kwargs):
     """Applies function func to the file handle f.
     If f is an open file object, it will stay open.
     If f is not open, it will be opened then closed again after
-    processing before returning.
+    processing before returning. Files are opened with a large write
+    buffer, so that the many small fragments written by the append_*
+    functions reach the disk in a few large chunks.
+    If f has an append method (e.g. a list), the text is appended to it,
+    as done by _emit.
     """
-    if hasattr(f, 'read'):
+    if hasattr(f, 'read') or hasattr(f, 'append'):
         return func(f, **kwargs)
     else:
         mode = kwargs.get('filemode', 'a')
-        with open(f, mode) as f:
+        with open(f, mode, buffering=_BUFFER_SIZE) as f:
             return func(f, **kwargs)
 
-            
+
+def _emit(file, txt):
+    """Writes txt to file. If file has an append method (e.g. a list), the
+    text is appended instead, so that documents can be assembled in memory
+    and written with a single ''.join(file).
+    """
+    append = getattr(file, 'append', None)
+    if append is not None:
+        append(txt)
+    else:
+        file.write(txt)
+
+
+def produce_many(infos, produce_fn, workers=None):
+    """Calls produce_fn(info) for each info in infos using a pool of worker
+    processes, e.g. to generate the tex files of many samples in parallel.
+    Returns the list of results in the same order as infos.
+    
+    Parameters
+    ----------
+    infos: iterable
+        the arguments to pass to produce_fn, one call per item
+    produce_fn: function
+        function to call, must be defined at module level so that it
+        can be passed to the worker processes
+    workers: int
+        number of worker processes, defaults to os.cpu_count()
+    """
+    # Processes rather than threads, since pandas holds the GIL while 
+    # reading excel files and rendering tables
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(produce_fn, infos))
+
+
 def create_dirs(dir_list):
     """Creates all directories in the list of directories
     if they do not already exist.
+    Raises an OSError if a path exists but is not a directory.
     """
     for d in dir_list:
-        if not os.path.exists(d):
-            os.makedirs(d)
+        os.makedirs(d, exist_ok=True)
+
+
+@functools.lru_cache(maxsize=32)
+def _read_sheet(path, mtime, sheet, columns):
+    # mtime is part of the cache key so that modified files are reread
+    if columns is None:
+        usecols = None
+    else:
+        usecols = lambda col: col in columns
+    return pd.read_excel(path, sheet_name=sheet, usecols=usecols)
+
+
+def load_results(path, sheet='results', columns=None):
+    """Returns the sheet named sheet from the excel file path as a 
+    dataframe. Parsed sheets are cached, so repeated calls for the same
+    file are cheap until the file is modified. 
+    The returned dataframe is a copy and may be modified freely.
+    
+    If columns is a list of column names, only these columns are read.
+    Names not present in the sheet are ignored, and the columns are 
+    returned in the order they appear in the sheet.
+    """
+    path = os.path.abspath(path)
+    if columns is not None:
+        columns = frozenset(columns)
+    return _read_sheet(path, os.path.getmtime(path), sheet, columns).copy()
+
+
+def _escape_latex(v):
+    return v.translate(_LATEX_ESC) if isinstance(v, str) else v
+
+
+def escape_latex_column(s):
+    """Escapes LaTeX special characters in all string values of the 
+    pandas Series s. Other values are left untouched."""
+    return s.map(_escape_latex)
+
+
+def _escape_latex_labels(labels):
+    """Escapes LaTeX special characters in the string labels and names of
+    the (Multi)Index labels, level by level."""
+    names = [_escape_latex(n) for n in labels.names]
+    if isinstance(labels, pd.MultiIndex):
+        levels = [labels.get_level_values(i).map(_escape_latex) 
+                  for i in range(labels.nlevels)]
+        return pd.MultiIndex.from_arrays(levels, names=names)
+    return labels.map(_escape_latex).rename(names[0])
+
+
+def _escape_latex_frame(df):
+    """Returns a copy of df with LaTeX special characters escaped in string 
+    cells, column and index labels and their names, as done by 
+    df.to_latex(escape=True).
+    """
+    if isinstance(df, pd.Series):
+        df = df.to_frame()
+    df = df.copy()
+    # Work by position, column labels need not be unique
+    for i in range(df.shape[1]):
+        col = df.iloc[:, i]
+        if col.dtype == object or pd.api.types.is_string_dtype(col):
+            df.isetitem(i, escape_latex_column(col))
+    df.columns = _escape_latex_labels(df.columns)
+    df.index = _escape_latex_labels(df.index)
+    return df
+
 
 def escape_curly_braces(s):
     """Escapes curly braces in a string or a list of strings."""
@@ -62,9 +182,13 @@ def escape_curly_braces(s):
 def fixed(x, sig=3):
     """Returns the value x as a text string in fixed format
     with the number of decimals specified by argument sig.
+    None and NaN values are returned as empty strings.
     """
-    txt = '{{0:.{0:d}f'.format(sig) + '}'
-    if np.isnan(x):
+    txt = _FIXED_CACHE.get(sig)
+    if txt is None:
+        txt = _FIXED_CACHE.setdefault(sig, '{{0:.{0:d}f}}'.format(sig))
+    # NaN is the only value not equal to itself
+    if x is None or x != x:
         return ''
     else:
         return txt.format(x)
@@ -75,16 +199,81 @@ def scientific(x, sig=3, tex=True):
     with the number of decimals specified by argument sig.
     If argument tex is True, the text string will be tex formated.
     It is assumed that the package siunitx is used.
+    None and NaN values are returned as empty strings.
     """
-    txt_tex = '\\num{{{0:.'+'{0:d}e'.format(sig) + '}}}'
-    txt = '{{0:.{0:d}e'.format(sig) + '}'
-    if np.isnan(x):
+    if tex:
+        txt = _SCI_TEX_CACHE.get(sig)
+        if txt is None:
+            txt = _SCI_TEX_CACHE.setdefault(sig, '\\num{{{{{{0:.{0:d}e}}}}}}'.format(sig))
+    else:
+        txt = _SCI_CACHE.get(sig)
+        if txt is None:
+            txt = _SCI_CACHE.setdefault(sig, '{{0:.{0:d}e}}'.format(sig))
+    # NaN is the only value not equal to itself
+    if x is None or x != x:
         return ''
     else:
-        if tex:
-            return txt_tex.format(x)
+        return txt.format(x)
+
+
+def fixed_array(arr, sig=3):
+    """Array version of fixed(). Returns an object array of text strings 
+    with the values of arr in fixed format with sig decimals. 
+    NaN values are returned as empty strings.
+    """
+    arr = np.asarray(arr, dtype=float)
+    out = np.full(arr.shape, '', dtype=object)
+    mask = ~np.isnan(arr)
+    out[mask] = np.char.mod('%.{0:d}f'.format(sig), arr[mask])
+    return out
+
+
+def scientific_array(arr, sig=3, tex=True):
+    """Array version of scientific(). Returns an object array of text 
+    strings with the values of arr in scientific format with sig decimals.
+    If argument tex is True, the text strings will be tex formated.
+    NaN values are returned as empty strings.
+    """
+    arr = np.asarray(arr, dtype=float)
+    out = np.full(arr.shape, '', dtype=object)
+    mask = ~np.isnan(arr)
+    txt = np.char.mod('%.{0:d}e'.format(sig), arr[mask])
+    if tex:
+        txt = np.char.add(np.char.add('\\num{', txt), '}')
+    out[mask] = txt
+    return out
+
+
+def format_columns(df, spec):
+    """Returns a copy of the dataframe df where the columns listed in spec
+    have been converted to text strings, one column at a time.
+
+    This gives the same result as passing fixed() and scientific() as 
+    formatters to df.to_latex, but formats each column in a single 
+    vectorized pass instead of one python call per cell.
+    
+    Parameters
+    ----------
+    df: DataFrame object
+        the table to format
+    spec: dictionary
+        maps column names to a tuple (kind, sig), where kind is either 
+        'fixed' or 'sci' and sig is the number of decimals. Scientific 
+        values are tex formated for the siunitx package. 
+        Columns not present in df are ignored.
+    """
+    df = df.copy()
+    for col, (kind, sig) in spec.items():
+        if col not in df.columns:
+            continue
+        arr = df[col].to_numpy(dtype=float)
+        if kind == 'fixed':
+            df[col] = fixed_array(arr, sig)
+        elif kind == 'sci':
+            df[col] = scientific_array(arr, sig)
         else:
-            return txt.format(x)
+            raise ValueError("Unknown format '{0}' for column '{1}'".format(kind, col))
+    return df
 
             
 def append_figure(file, figfilepath, sideways=False, caption=None, label=None, 
@@ -93,8 +282,8 @@ def append_figure(file, figfilepath, sideways=False, caption=None, label=None,
     
     Parameters
     ----------
-    file: open file object
-        text file to append figure to
+    file: open file object or list
+        text file to append figure to, or list to append the text to
     figfilepath: string
         path and filename of figure file
     sideways: boolean
@@ -111,37 +300,45 @@ def append_figure(file, figfilepath, sideways=False, caption=None, label=None,
         additional arguments to pass to includegraphics
     """
     if sideways:
-        txt = swfig
+        fig = _swfig
     else:
-        txt = normalfig
+        fig = _normalfig
     
     if caption is not None:
-        cap = '\n' + r'\caption{{{0}}}'.format(caption)
+        cap = f'\n\\caption{{{caption}}}'
     else:
         cap = ''
     
     if label is not None:
-        lab = '\n' + r'\label{{fig:{0}}}'.format(label)
+        lab = f'\n\\label{{fig:{label}}}'
     else:
         lab = ''
     
-    args = 'width={0}'.format(width)
+    args = f'width={width}'
     if fig_args:
-        args = args+',{0}'.format(fig_args)
-    file.write(txt.format(loc, args, figfilepath, cap, lab)+'\n\n')
+        args = f'{args},{fig_args}'
+    _emit(file, fig(loc, args, figfilepath, cap, lab) + '\n\n')
 
     
 def append_table(file, df, na_rep='', small=True, sideways=False, centering=False, 
                  loc='[htp]', caption=None, caption_above=True, label=None, 
-                 threeparttable=False, tablenotes='', **kwargs):
+                 threeparttable=False, tablenotes='', max_rows_inline=40, **kwargs):
     """Adds table to tex file, table should be passed as a pandas dataframe.
     
     Parameters
     ----------
-    file: open file object
-        text file to append figure to
-    df: DataFrame object
-        the table to add
+    file: open file object or list
+        text file to append table to, or list to append the text to
+    df: DataFrame or Styler object
+        the table to add. If a Styler (df.style) is passed, it is rendered 
+        directly with Styler.to_latex, and formatting, hiding of the index 
+        etc. must be set up on the Styler. In this case na_rep is ignored,
+        Stylers are never switched to a longtable automatically, and kwargs 
+        are passed to Styler.to_latex, except longtable=True which selects
+        the longtable environment. The df.to_latex arguments columns, 
+        header, index, index_names, escape, formatters, float_format, 
+        decimal, sparsify, bold_rows, multicolumn, multicolumn_format and 
+        multirow raise a ValueError.
     na_rep: string
         string to use when substituting na values
     small: boolean
@@ -164,90 +361,199 @@ def append_table(file, df, na_rep='', small=True, sideways=False, centering=Fals
         any footnotes to be typeset below the table, this automatically
         sets the threeparttable flag to True
         sets the caption_above flag to True
+    max_rows_inline: int
+        tables with more rows than this are typeset as a longtable (which 
+        requires the longtable package), unless longtable is passed 
+        explicitly in kwargs. A longtable is not wrapped in a table 
+        environment; caption and label are handled by df.to_latex, which
+        always puts the caption at the top, and the centering, loc, 
+        caption_above and tablenotes arguments have no effect. 
+        Sideways tables, threeparttables, Series and Stylers are never 
+        switched automatically. Use None to disable.
     kwargs: dictionary
-        additional keyword arguments to pass to df.to_latex
+        additional keyword arguments to pass to df.to_latex. 
+        Passing escape='fast' escapes LaTeX special characters in string
+        cells, column and index labels before calling df.to_latex with 
+        escape=False, which is faster than the escaping done by pandas.
     """
     
-    if tablenotes is not None or tablenotes != "":
-        threeparttable = True
-        caption_above = True
+    appender = make_table_appender(na_rep=na_rep, small=small, sideways=sideways, 
+                                   centering=centering, loc=loc, 
+                                   caption_above=caption_above, 
+                                   threeparttable=threeparttable, 
+                                   tablenotes=tablenotes, 
+                                   max_rows_inline=max_rows_inline)
+    appender(file, df, caption=caption, label=label, **kwargs)
+
 
+def _table_environment(small, sideways, centering, loc, threeparttable, tablenotes):
+    """Returns the text to put before and after the tabular (and caption) 
+    for the table options used by append_table."""
+    head = []
     if sideways:
-        file.write('\\begin{turn}{90}\n')
-        file.write('\\begin{minipage}{0.9\\textheight}\n')
-        file.write('\\begin{table}[H]\n')
+        head.append('\\begin{turn}{90}\n')
+        head.append('\\begin{minipage}{0.9\\textheight}\n')
+        head.append('\\begin{table}[H]\n')
     else:
-        file.write('\\begin{{table}}{0}\n'.format(loc))
+        head.append(f'\\begin{{table}}{loc}\n')
 
     if centering:
-        file.write('\\centering\n')
+        head.append('\\centering\n')
     
     if threeparttable:
-        file.write('\\begin{threeparttable}\n')
+        head.append('\\begin{threeparttable}\n')
         
     if small:
-        file.write('\\small\n')
+        head.append('\\small\n')
+    
+    tail = []
+    if threeparttable:
+        tail.append(r'\begin{tablenotes}' + '\n')
+        tail.append(tablenotes)
+        tail.append('\n')
+        tail.append(r'\end{tablenotes}' + '\n')
+        tail.append(r'\end{threeparttable}' + '\n')
     
+    tail.append('\\end{table}')
+
+    if sideways:
+        tail.append('\\end{minipage}\n')
+        tail.append('\\end{turn}\n')
+    
+    tail.append('\n\n')
+    return ''.join(head), ''.join(tail)
+
+
+def _caption_label(caption, label):
+    """Returns the caption and label lines of a table."""
     if caption is not None:
-        cap = '\n' + r'\caption{{{0}}}'.format(caption)
+        cap = f'\n\\caption{{{caption}}}'
     else:
         cap = ''
     
     if label is not None:
-        lab = '\n' + r'\label{{tab:{0}}}'.format(label)
+        lab = f'\n\\label{{tab:{label}}}'
     else:
         lab = ''
+    return cap + lab + '\n'
+
+
+def _use_longtable(df, kwargs, max_rows_inline, sideways, threeparttable):
+    """Returns True if append_table should typeset df as a longtable."""
+    if 'longtable' in kwargs:
+        return kwargs['longtable']
+    if max_rows_inline is None or sideways or threeparttable:
+        return False
+    if not isinstance(df, pd.DataFrame):
+        return False
+    return len(df) > max_rows_inline
 
-    if caption_above:
-        file.write(cap)
-        file.write(lab+'\n')
 
+def _longtable(df, na_rep, small, caption, label, kwargs):
+    """Returns df as a longtable, with caption and label set by df.to_latex."""
+    kwargs['longtable'] = True
+    if caption is not None:
+        kwargs['caption'] = caption
+    if label is not None:
+        kwargs['label'] = f'tab:{label}'
+    
+    txt = _table_body(df, na_rep, kwargs)
+    if small:
+        return '\\begin{small}\n' + txt + '\\end{small}\n\n'
+    else:
+        return txt + '\n'
+
+
+def _table_body(df, na_rep, kwargs):
+    """Returns the tabular produced by df.to_latex for append_table."""
+    if not isinstance(df, (pd.DataFrame, pd.Series)):
+        return _styler_to_latex(df, kwargs)
+    
     # Use only columns mentioned in kwargs['columns']
     # Ensure columns are in the right order
     if 'columns' in kwargs:
         columns = kwargs.pop('columns')
         df = df[columns]
 
-    txt = df.to_latex(na_rep=na_rep, **kwargs)
-    file.write(txt)
+    if kwargs.get('escape') == 'fast':
+        df = _escape_latex_frame(df)
+        kwargs['escape'] = False
+
+    return df.to_latex(na_rep=na_rep, **kwargs)
+
+
+def _styler_to_latex(styler, kwargs):
+    """Returns the tabular produced by styler.to_latex for append_table.
+    Formatting and hiding is already set up on the Styler, so the 
+    df.to_latex arguments for these are rejected."""
+    unsupported = [k for k in _DATAFRAME_ONLY_KWARGS if k in kwargs]
+    if unsupported:
+        raise ValueError('Arguments not supported when passing a Styler, '
+                         'set these up on the Styler instead: {0}'.format(', '.join(unsupported)))
     
-    if not caption_above:
-        file.write(cap)
-        file.write(lab+'\n')
-        
-    if threeparttable:
-        file.write(r'\begin{tablenotes}' + '\n')
-        file.write(tablenotes)
-        file.write('\n')
-        file.write(r'\end{tablenotes}' + '\n')
-        file.write(r'\end{threeparttable}' + '\n')
+    if kwargs.pop('longtable', False):
+        kwargs['environment'] = 'longtable'
+    kwargs.setdefault('hrules', True)
+    return styler.to_latex(**kwargs)
+
+
+def make_table_appender(na_rep='', small=True, sideways=False, centering=False, 
+                        loc='[htp]', caption_above=True, threeparttable=False, 
+                        tablenotes='', max_rows_inline=40):
+    """Returns a function appender(file, df, caption=None, label=None, **kwargs)
+    which works like append_table, with the table options fixed to the
+    values passed here. 
     
-    file.write('\\end{table}')
+    The text surrounding the tabular is assembled once, so this is 
+    faster than append_table when adding many tables with the same layout,
+    e.g. in a loop. append_table itself is implemented with this function.
+    See append_table for a description of the arguments.
+    kwargs passed to appender are passed on to df.to_latex.
+    """
+    if tablenotes:
+        threeparttable = True
+        caption_above = True
 
-    if sideways:
-        file.write('\\end{minipage}\n')
-        file.write('\\end{turn}\n')
+    head, tail = _table_environment(small, sideways, centering, loc, 
+                                     threeparttable, tablenotes)
+    
+    # Choose the placement of the caption once
+    if caption_above:
+        def assemble(caplab, txt):
+            return ''.join([head, caplab, txt, tail])
+    else:
+        def assemble(caplab, txt):
+            return ''.join([head, txt, caplab, tail])
     
-    file.write('\n\n')
+    def appender(file, df, caption=None, label=None, **kwargs):
+        if _use_longtable(df, kwargs, max_rows_inline, sideways, threeparttable):
+            _emit(file, _longtable(df, na_rep, small, caption, label, kwargs))
+            return
+        txt = _table_body(df, na_rep, kwargs)
+        # Collect the fragments and write them in one go
+        _emit(file, assemble(_caption_label(caption, label), txt))
+    
+    return appender
 
     
 def append_section_heading(file, secname, label=None, indent=0):
+    pad = ' '*indent
     if label is None:
-        file.write('{0}'.format(' '*indent) + r'\section{{{1}}}'.format(secname) + '\n\n')
+        _emit(file, f'{pad}\\section{{{secname}}}\n\n')
     else:
-        file.write('{0}'.format(' '*indent) + r'\section{{{1}}}\label{{{2}}}'.format(secname, label) + '\n\n')
+        _emit(file, f'{pad}\\section{{{secname}}}\\label{{{label}}}\n\n')
     
 
 def append_newpage(file):
-    file.write('\\clearpage\n\n')
+    _emit(file, '\\clearpage\n\n')
 
     
 def append_chapter_title(file, title, label=None):
-    txt = r'\chapter{{{0}}}'.format(title)
+    txt = f'\\chapter{{{title}}}'
     if label is not None:
-        txt += r'\label{{{0}}}'.format(label)
+        txt += f'\\label{{{label}}}'
     
-    file.write(txt+'\n\n')
+    _emit(file, txt+'\n\n')
     
 """
 EXAMPLE OF HOW PACKAGE COULD BE USED:
@@ -264,7 +570,8 @@ def produce_latex_file(info):
         
     steps = sorted([d['step'] for d in history])
     
-    with open(latex_info['filename'], 'w') as f:
+    # Build the document in memory and write it to disk in one go
+    with io.StringIO() as f:
         
         append_chapter_title(f, 'Sample "{0}"'.format(sample_info['name']), 
                              label='app:{0}'.format(sample_info['nickname'].lower().replace(' ','_')))
@@ -299,26 +606,24 @@ def produce_latex_file(info):
         append_section_heading(f, 'Overview of load steps and interpreted results')
         
         if os.path.exists(latex_info['interpretation_file']):
-            results = pd.read_excel(latex_info['interpretation_file'], sheetname='results')
-            
 
                         
-            formatters = {'step':   lambda x: fixed(x, 0),
-                          'load':   lambda x: fixed(x, 1),
-                          'temp':   lambda x: fixed(x, 1),
-                          'eps0':   lambda x: fixed(x, 3),
-                          'eps50':  lambda x: fixed(x, 3),
-                          'eps90':  lambda x: fixed(x, 3),
-                          'eps100': lambda x: fixed(x, 3),
-                          'epsf':   lambda x: fixed(x, 3),
-                          't50':    lambda x: fixed(x, 3),
-                          't90':    lambda x: fixed(x, 3),
-                          't100':   lambda x: fixed(x, 3),
-                          'epss':   lambda x: fixed(x, 3),
-                          'Cv':     lambda x: scientific(x, 3),
-                          'K':      lambda x: fixed(x, 0),
-                          'k0':     lambda x: scientific(x, 3)
-                         }
+            spec = {'step':   ('fixed', 0),
+                    'load':   ('fixed', 1),
+                    'temp':   ('fixed', 1),
+                    'eps0':   ('fixed', 3),
+                    'eps50':  ('fixed', 3),
+                    'eps90':  ('fixed', 3),
+                    'eps100': ('fixed', 3),
+                    'epsf':   ('fixed', 3),
+                    't50':    ('fixed', 3),
+                    't90':    ('fixed', 3),
+                    't100':   ('fixed', 3),
+                    'epss':   ('fixed', 3),
+                    'Cv':     ('sci', 3),
+                    'K':      ('fixed', 0),
+                    'k0':     ('sci', 3)
+                   }
             
 
             columns = ['step',
@@ -333,9 +638,11 @@ def produce_latex_file(info):
                        'K',    
                        'k0']
             
-            dropcols = [col for col in results.columns if col not in columns]
-            df = results.drop(labels=dropcols, axis=1, inplace=False)                
+            # read only the columns that go into the table
+            df = load_results(latex_info['interpretation_file'], sheet='results', 
+                              columns=columns)
             cols = [col for col in columns if col in df.columns]
+            df = format_columns(df, spec)
             
             # Since we are using siunitx to typeset the columns, 
             # non-numerical cell contents must be braced...
@@ -355,7 +662,7 @@ def produce_latex_file(info):
             heads = [headers[id] for id, col in enumerate(columns) if col in df.columns]
                         
             append_table(f, df, centering=True, sideways=True, loc='[H]', columns=cols, header=heads, 
-                        na_rep='', index=False, escape=False, formatters=formatters,
+                        na_rep='', index=False, escape=False,
                         column_format='c'*len(heads))
                         
         else:
@@ -387,4 +694,12 @@ def produce_latex_file(info):
             append_newpage(f)
     
         f.write('\\fi\n')
+        
+        with open(latex_info['filename'], 'w') as fh:
+            fh.write(f.getvalue())
+
+
+if __name__ == '__main__':
+    # one info dictionary per sample
+    produce_many(infos, produce_latex_file)
 """